@@ -0,0 +1,163 @@
+"""Self-play tuning of the bot's strategy weights.
+
+Searches the StrategyWeights space (see league-1.py) with CMA-ES when the
+``cma`` package is installed, falling back to plain random search
+otherwise. Random search and CMA-ES both beat grid search here: eight
+continuous dimensions make any useful grid astronomically large, while a
+few hundred sampled points already cover the space.
+
+Fitness is the win rate of a candidate over self-play games against the
+baseline weights. Games are driven by an external referee command that
+runs two bot commands against each other and prints the winning player
+index (0 or 1) on its last line of output, e.g. a brutaltester-style
+wrapper:
+
+    python tune.py --referee "java -jar referee.jar -p1 {p1} -p2 {p2}" \
+        --games 32 --iterations 40
+
+Each bot is launched as ``python league-1.py`` with the candidate (or
+baseline) weights written to a temp JSON file and exposed through the
+UTG_WEIGHTS environment variable, which league-1.py reads at startup.
+Population members are evaluated in parallel with multiprocessing.Pool;
+the best weights found are written to best_weights.json.
+"""
+
+import argparse
+import dataclasses
+import importlib.util
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import tempfile
+from multiprocessing import Pool
+
+try:
+    import cma
+
+    HAVE_CMA = True
+except ImportError:
+    HAVE_CMA = False
+
+# league-1.py has a hyphen in its name, so load it via importlib
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_spec = importlib.util.spec_from_file_location(
+    "league_1", os.path.join(_HERE, "league-1.py")
+)
+_mod = importlib.util.module_from_spec(_spec)
+sys.modules["league_1"] = _mod  # dataclass machinery resolves via sys.modules
+_spec.loader.exec_module(_mod)
+StrategyWeights = _mod.StrategyWeights
+
+FIELDS = [f.name for f in dataclasses.fields(StrategyWeights)]
+BASELINE = [getattr(StrategyWeights(), name) for name in FIELDS]
+BOT_CMD = f"{sys.executable} {os.path.join(os.path.dirname(os.path.abspath(__file__)), 'league-1.py')}"
+
+
+def _weights_file(vector):
+    """Write a weight vector to a temp JSON file and return its path."""
+    fd, path = tempfile.mkstemp(suffix=".json", prefix="utg_weights_")
+    with os.fdopen(fd, "w") as f:
+        json.dump(dict(zip(FIELDS, vector)), f)
+    return path
+
+
+def _play_game(args):
+    """Run one referee game, candidate as player 0. Returns 1.0 on a win."""
+    referee, candidate_json, baseline_json, swap = args
+    p1_env = f"UTG_WEIGHTS={baseline_json if swap else candidate_json}"
+    p2_env = f"UTG_WEIGHTS={candidate_json if swap else baseline_json}"
+    cmd = referee.format(
+        p1=shlex.quote(f"env {p1_env} {BOT_CMD}"),
+        p2=shlex.quote(f"env {p2_env} {BOT_CMD}"),
+    )
+    out = subprocess.run(
+        cmd, shell=True, capture_output=True, text=True, timeout=300
+    ).stdout.strip()
+    winner = out.splitlines()[-1].strip() if out else ""
+    if winner not in ("0", "1"):
+        return 0.5  # unparseable result counts as a draw
+    won = (winner == "1") if swap else (winner == "0")
+    return 1.0 if won else 0.0
+
+
+def evaluate(vector, referee, games, pool):
+    """Win rate of a candidate weight vector against the baseline."""
+    candidate_json = _weights_file(vector)
+    baseline_json = _weights_file(BASELINE)
+    try:
+        # Alternate sides to cancel any first-player advantage
+        jobs = [
+            (referee, candidate_json, baseline_json, g % 2 == 1)
+            for g in range(games)
+        ]
+        results = pool.map(_play_game, jobs)
+        return sum(results) / games
+    finally:
+        os.unlink(candidate_json)
+        os.unlink(baseline_json)
+
+
+def random_neighbor(rng, vector, sigma):
+    return [x + rng.gauss(0.0, sigma * max(1.0, abs(x))) for x in vector]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--referee",
+        required=True,
+        help="referee command with {p1} and {p2} placeholders; must print"
+        " the winning player index (0 or 1) on its last output line",
+    )
+    parser.add_argument("--games", type=int, default=16, help="games per candidate")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--sigma", type=float, default=0.3, help="relative step size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default="best_weights.json")
+    args = parser.parse_args()
+
+    best_vector = list(BASELINE)
+    best_fitness = 0.5  # baseline vs itself
+    pool = Pool(args.jobs)
+
+    if HAVE_CMA:
+        es = cma.CMAEvolutionStrategy(
+            best_vector, args.sigma * 10.0, {"seed": args.seed or None}
+        )
+        for _ in range(args.iterations):
+            if es.stop():
+                break
+            candidates = es.ask()
+            fitnesses = [
+                evaluate(list(c), args.referee, args.games, pool) for c in candidates
+            ]
+            es.tell(candidates, [-f for f in fitnesses])  # cma minimizes
+            gen_best = max(range(len(candidates)), key=lambda i: fitnesses[i])
+            if fitnesses[gen_best] > best_fitness:
+                best_fitness = fitnesses[gen_best]
+                best_vector = list(candidates[gen_best])
+            print(f"gen best {fitnesses[gen_best]:.3f}  overall {best_fitness:.3f}")
+    else:
+        print("cma not installed; using random search", file=sys.stderr)
+        rng = random.Random(args.seed)
+        for i in range(args.iterations):
+            candidate = random_neighbor(rng, best_vector, args.sigma)
+            fitness = evaluate(candidate, args.referee, args.games, pool)
+            if fitness > best_fitness:
+                best_fitness = fitness
+                best_vector = candidate
+            print(f"iter {i}: {fitness:.3f}  overall {best_fitness:.3f}")
+
+    pool.close()
+    pool.join()
+    with open(args.out, "w") as f:
+        json.dump(dict(zip(FIELDS, best_vector)), f, indent=2)
+    print(f"best win rate {best_fitness:.3f} -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()